@@ -1,16 +1,36 @@
-# led_dashboard.py
+# interfact.py – direct-DB variant of led_dashboard.py (no FastAPI in between)
 import streamlit as st
 from datetime import datetime, timedelta
 
 import pandas as pd
+from sqlalchemy import bindparam, func, lambda_stmt, select
 from sqlalchemy.orm import Session
 
 from database import SessionLocal          # same helper you used in FastAPI
 import models                              # Sensor, Led, BrightnessLevel, ...
 
 # ---------- helper functions -------------------------------------------------
-@st.cache_data(ttl=60)          # re-query at most once a minute
-def fetch_led_list() -> dict[int, str]:
+# built + compiled once, re-executed every poll with a new :lid
+_latest_stmt = lambda_stmt(
+    lambda: select(models.BrightnessLevel.level)
+    .where(models.BrightnessLevel.led_id == bindparam("lid"))
+    .order_by(models.BrightnessLevel.ts.desc())
+    .limit(1)
+)
+
+@st.cache_data(ttl=5)           # cheap change tag, re-checked every 5 s
+def fetch_leds_version() -> tuple:
+    """(MAX(id), COUNT(*), SUM(wattage)) of the leds table."""
+    with SessionLocal() as db:
+        return tuple(
+            db.execute(
+                select(func.max(models.Led.id), func.count(), func.sum(models.Led.wattage))
+                .select_from(models.Led)
+            ).one()
+        )
+
+@st.cache_data(max_entries=4)   # re-query only when the version changes
+def fetch_led_list(version: tuple) -> dict[int, str]:
     """Return {led_id: friendly name}."""
     with SessionLocal() as db:
         leds = db.query(models.Led).order_by(models.Led.id).all()
@@ -20,13 +40,7 @@ def fetch_led_list() -> dict[int, str]:
 def fetch_latest_brightness(led_id: int) -> int | None:
     """Most recent brightness % for the given LED (or None)."""
     with SessionLocal() as db:
-        row = (
-            db.query(models.BrightnessLevel.level)
-              .filter(models.BrightnessLevel.led_id == led_id)
-              .order_by(models.BrightnessLevel.ts.desc())
-              .first()
-        )
-        return row[0] if row else None
+        return db.execute(_latest_stmt, {"lid": led_id}).scalar_one_or_none()
 
 @st.cache_data(ttl=30)
 def fetch_history(led_id: int, hours: int = 24) -> pd.DataFrame:
@@ -48,7 +62,7 @@ def fetch_history(led_id: int, hours: int = 24) -> pd.DataFrame:
 st.set_page_config(page_title="LED Brightness Monitor", layout="centered")
 st.title("💡 LED Brightness Monitor")
 
-led_lookup = fetch_led_list()
+led_lookup = fetch_led_list(fetch_leds_version())
 if not led_lookup:
     st.error("No LEDs found in the database.")
     st.stop()
@@ -4,11 +4,22 @@ Streamlit dashboard that calls a FastAPI backend to show
 24-hour brightness history for any LED fixture, plus a Cost-savings page.
 """
 
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from functools import wraps
+
 import streamlit as st
+import numpy as np
+import orjson
 import pandas as pd
 import httpx
 from datetime import datetime, timezone
 
+log = logging.getLogger(__name__)
+
 
 # --------------------------------------------------------------------
 # Configuration – change for your deployment
@@ -16,43 +27,167 @@ from datetime import datetime, timezone
 API_BASE = "http://localhost:8000/api"         # FastAPI base url
 HISTORY_WINDOW_H = 24                          # hours of data to plot
 REQUEST_TIMEOUT  = 15.0                        # seconds
+CACHE_STATS_WINDOW = 100                       # calls per fn for the rolling hit ratio
+CACHE_ALERT_RATIO  = 0.5                       # log a warning below this hit ratio
 # --------------------------------------------------------------------
 
+# ---------- cache observability -------------------------------------
+# st.cache_data keeps no hit/miss counters, so we record our own: the
+# wrapped function only runs on a miss, the outer wrapper runs on every call.
+_miss = threading.local()
+
+@st.cache_resource
+def _cache_stats() -> dict:
+    """Process-wide {fn name: counters}; survives reruns like the caches do."""
+    return {"lock": threading.Lock(), "fns": {}}
+
+def _fn_stats(name: str) -> dict:
+    return _cache_stats()["fns"].setdefault(name, {
+        "hits": 0,
+        "misses": 0,
+        "compute_ms": 0.0,
+        "window": deque(maxlen=CACHE_STATS_WINDOW),   # True = hit
+        "alerted": False,
+    })
+
+def tracked_cache_data(**cache_kwargs):
+    """@st.cache_data(**cache_kwargs) that also records hits, misses and compute time."""
+    def decorator(fn):
+        name = fn.__name__
+
+        @wraps(fn)
+        def compute(*args, **kwargs):
+            _miss.flag = True
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+                with _cache_stats()["lock"]:
+                    _fn_stats(name)["compute_ms"] += elapsed_ms
+
+        cached = st.cache_data(**cache_kwargs)(compute)
+
+        @wraps(fn)
+        def call(*args, **kwargs):
+            _miss.flag = False
+            result = cached(*args, **kwargs)
+            hit = not _miss.flag
+            with _cache_stats()["lock"]:
+                stats = _fn_stats(name)
+                stats["hits" if hit else "misses"] += 1
+                stats["window"].append(hit)
+                window = stats["window"]
+                ratio = sum(window) / len(window)
+                if len(window) == window.maxlen and ratio < CACHE_ALERT_RATIO:
+                    if not stats["alerted"]:
+                        log.warning(
+                            "cache hit ratio for %s is %.0f%% over the last %d calls",
+                            name, ratio * 100, len(window),
+                        )
+                    stats["alerted"] = True
+                else:
+                    stats["alerted"] = False
+            return result
+
+        call.clear = cached.clear
+        return call
+    return decorator
+
 # ---------- helper functions ----------------------------------------
-@st.cache_data(ttl=3000)
-def fetch_led_list() -> dict[int, str]:
-    """Return {led_id: 'LED 3 – 18.75 W', …} for dropdown."""
-    resp = httpx.get(f"{API_BASE}/leds", timeout=REQUEST_TIMEOUT)
+@st.cache_resource
+def get_client() -> httpx.Client:
+    """
+    One keep-alive connection pool shared by every session and rerun,
+    so the slider / refresh doesn't pay a TCP handshake per request.
+    """
+    client = httpx.Client(
+        base_url=API_BASE,
+        timeout=REQUEST_TIMEOUT,
+        limits=httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=100,
+            keepalive_expiry=30,
+        ),
+    )
+    atexit.register(client.close)
+    return client
+
+@tracked_cache_data(ttl=5)
+def fetch_leds_version() -> str:
+    """Tiny change tag for the fixture list (re-checked every 5 s)."""
+    resp = get_client().get("/leds/version")
+    resp.raise_for_status()
+    return resp.json()["version"]
+
+@tracked_cache_data(max_entries=4)
+def fetch_led_list(version: str) -> dict[int, str]:
+    """
+    Return {led_id: 'LED 3 – 18.75 W', …} for dropdown.
+    Cached per *version*: refetched only when the fixture list changed.
+    """
+    resp = get_client().get("/leds")
     resp.raise_for_status()
     data = resp.json()
     return {row["id"]: f"LED {row['id']} – {row['wattage']} W" for row in data}
 
-@st.cache_data(ttl=30)
-def fetch_history_df(led_id: int, hours: int = HISTORY_WINDOW_H) -> pd.DataFrame:
-    """Return a DataFrame indexed by ts with a 'level' column."""
-    resp = httpx.get(
-        f"{API_BASE}/leds/{led_id}/history",
-        params={"hours": hours},
-        timeout=REQUEST_TIMEOUT,
+def _history_df(rows: list[dict]) -> pd.DataFrame:
+    """
+    Return a DataFrame indexed by ts with a 'level' column.
+    The API already orders by ts, so the frame is built with its index in
+    place – no set_index / sort_index copies.
+    """
+    # rows: [{ts: 1718000000, level: 40}, …] – ts is epoch seconds, UTC
+    ts = pd.to_datetime(
+        np.fromiter((r["ts"] for r in rows), dtype=np.int64, count=len(rows)),
+        unit="s",
+        utc=True,
+    )
+    levels = np.fromiter((r["level"] for r in rows), dtype=np.int64, count=len(rows))
+    assert ts.is_monotonic_increasing, "history must arrive ordered by ts"
+
+    return pd.DataFrame(
+        {"level": levels}, index=pd.DatetimeIndex(ts, name="ts"), copy=False
+    )
+
+@tracked_cache_data(ttl=30)
+def fetch_snapshot(
+    led_id: int, hours: int = HISTORY_WINDOW_H
+) -> tuple[dict, dict | None, pd.DataFrame]:
+    """
+    GET /api/dashboard_snapshot – LED metadata + history in one round trip.
+    Returns (led, latest sample, history); the history is bucket-averaged
+    server-side, so the KPI reads the exact last sample instead.
+
+    Conditional GET: the last ETag + result live in session_state, and a
+    304 reuses them without transferring or parsing the body again.
+    """
+    state_key = f"snapshot:{led_id}:{hours}"
+    etag, cached = st.session_state.get(state_key, (None, None))
+
+    resp = get_client().get(
+        "/dashboard_snapshot",
+        params={"led_id": led_id, "hours": hours},
+        headers={"If-None-Match": etag} if etag else None,
     )
+    if resp.status_code == 304 and cached is not None:
+        return cached
     resp.raise_for_status()
-    rows = resp.json()                         # [{ts: "...", level: 40}, …]
-    if not rows:
-        return pd.DataFrame([], columns=["ts", "level"]).set_index("ts")
+    data = orjson.loads(resp.content)  # {led: {...}, history: [...], latest: {...}}
+    result = data["led"], data["latest"], _history_df(data["history"])
 
-    df = pd.DataFrame(rows)
-    df["ts"] = pd.to_datetime(df["ts"])
-    return df.set_index("ts").sort_index()
+    if "ETag" in resp.headers:
+        st.session_state[state_key] = (resp.headers["ETag"], result)
+    return result
 
 def override_brightness(led_id: int, level: int) -> bool:
     """
     POST /api/override_brightness
     """
     try:
-        r = httpx.post(
-            f"{API_BASE}/override_brightness",
+        r = get_client().post(
+            "/override_brightness",
             json={"led_id": led_id, "level": level},
-            timeout=REQUEST_TIMEOUT,
         )
         return r.status_code == 201      # created
     except httpx.RequestError:
@@ -63,16 +198,13 @@ def override_brightness(led_id: int, level: int) -> bool:
 # Page renderers
 # --------------------------------------------------------------------
 
-from datetime import datetime, timezone
-import streamlit as st
-
 def render_home() -> None:
     st.title("💡 LED Brightness – 24 h Trend")
 
     # ──────────────────────────────────────────────────────────────
     # 1️⃣  Fixture selector
     # ──────────────────────────────────────────────────────────────
-    led_lookup = fetch_led_list()
+    led_lookup = fetch_led_list(fetch_leds_version())
     if not led_lookup:
         st.error("No LEDs returned by the API.")
         return
@@ -86,9 +218,8 @@ def render_home() -> None:
     # ──────────────────────────────────────────────────────────────
     # 2️⃣  Data fetch + placeholders
     # ──────────────────────────────────────────────────────────────
-    hist_df   = fetch_history_df(selected_id)
-    latest_ts = hist_df.index[-1].to_pydatetime() if not hist_df.empty else None
-    latest_lv = int(hist_df["level"].iloc[-1])    if not hist_df.empty else None
+    led, latest, hist_df = fetch_snapshot(selected_id)
+    latest_lv = latest["level"] if latest else None
 
     metric_ph = st.empty()      # KPI placeholder
     chart_ph  = st.empty()      # Chart placeholder (needs to be defined early!)
@@ -124,7 +255,7 @@ def render_home() -> None:
 
                 # update chart (optimistic append)
                 if not hist_df.empty:
-                    hist_df.loc[datetime.utcnow()] = new_level
+                    hist_df.loc[datetime.now(timezone.utc)] = new_level
                     chart_ph.line_chart(hist_df["level"])
             else:
                 st.error("Failed to apply override")
@@ -141,10 +272,21 @@ def render_home() -> None:
     # 5️⃣  Footer
     # ──────────────────────────────────────────────────────────────
     st.caption(
+        f"LED {led['id']} ({led['wattage']} W) · "
         f"Data window: last {HISTORY_WINDOW_H} h · "
         f"Updated {datetime.now(timezone.utc):%Y-%m-%d %H:%M UTC}"
     )
 
+@tracked_cache_data(ttl=3600)
+def _cost_df() -> pd.DataFrame:
+    """Monthly savings (placeholder numbers) – built once, not per rerun."""
+    return pd.DataFrame(
+        {
+            "Month": ["Apr", "May", "Jun", "Jul"],
+            "₹ Saved": [410, 515, 620, 705],
+        }
+    ).set_index("Month")
+
 def render_cost_savings() -> None:
     """Placeholder cost-savings analytics page."""
     st.title("💰 Cost Savings Overview")
@@ -159,13 +301,33 @@ def render_cost_savings() -> None:
         """
     )
 
-    sample = pd.DataFrame(
-        {
-            "Month": ["Apr", "May", "Jun", "Jul"],
-            "₹ Saved": [410, 515, 620, 705],
-        }
-    ).set_index("Month")
-    st.bar_chart(sample)
+    st.bar_chart(_cost_df())
+
+def render_debug() -> None:
+    """Cache hit/miss table – only reachable with ?debug=1."""
+    st.title("🛠 Cache statistics")
+
+    with _cache_stats()["lock"]:
+        rows = [
+            {
+                "function": name,
+                "hits": c["hits"],
+                "misses": c["misses"],
+                "hit_ratio": c["hits"] / max(c["hits"] + c["misses"], 1),
+                "recent_hit_ratio": sum(c["window"]) / max(len(c["window"]), 1),
+                "avg_compute_ms": c["compute_ms"] / max(c["misses"], 1),
+            }
+            for name, c in sorted(_cache_stats()["fns"].items())
+        ]
+    if not rows:
+        st.info("No cached calls recorded yet.")
+        return
+
+    st.dataframe(pd.DataFrame(rows).set_index("function"))
+    st.caption(
+        f"recent = last {CACHE_STATS_WINDOW} calls · "
+        f"a warning is logged below {CACHE_ALERT_RATIO:.0%}"
+    )
 
 # --------------------------------------------------------------------
 # Main entrypoint
@@ -175,13 +337,18 @@ def main() -> None:
 
     # Sidebar navigation
     st.sidebar.title("🔀 Navigation")
-    page = st.sidebar.radio("Jump to:", ["Home", "Cost savings"], index=0)
+    pages = ["Home", "Cost savings"]
+    if st.query_params.get("debug") == "1":
+        pages.append("Cache debug")
+    page = st.sidebar.radio("Jump to:", pages, index=0)
 
     # Route to selected page
     if page == "Home":
         render_home()
-    else:
+    elif page == "Cost savings":
         render_cost_savings()
+    else:
+        render_debug()
 
 # Run immediately when Streamlit executes the file
 if __name__ == "__main__":
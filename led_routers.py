@@ -1,6 +1,8 @@
 # api/led_routes.py  – actual endpoints
+import hashlib
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import bindparam, func, lambda_stmt, select
 from sqlalchemy.orm import Session
 import schemas as s
 import models                   # your SQLAlchemy models
@@ -11,41 +13,151 @@ from database import get_db
 
 router = APIRouter(prefix="/api", tags=["leds"])
 
+# hot read paths: statements are built + compiled once, only params change
+_LEDS_STMT = lambda_stmt(lambda: select(models.Led).order_by(models.Led.id))
+_LEDS_VERSION_STMT = lambda_stmt(
+    lambda: select(func.max(models.Led.id), func.count(), func.sum(models.Led.wattage))
+    .select_from(models.Led)
+)
+_LATEST_STMT = lambda_stmt(
+    lambda: select(models.BrightnessLevel.ts, models.BrightnessLevel.level)
+    .where(models.BrightnessLevel.led_id == bindparam("lid"))
+    .order_by(models.BrightnessLevel.ts.desc())
+    .limit(1)
+)
+
+# history is averaged per time bucket: a chart can't show per-second points.
+# The bucket start is returned as epoch seconds, converted by MySQL.
+_BUCKET = (
+    func.floor(func.unix_timestamp(models.BrightnessLevel.ts) / bindparam("bucket_s"))
+    * bindparam("bucket_s")
+).label("bucket")
+_HISTORY_STMT = (
+    select(_BUCKET, func.round(func.avg(models.BrightnessLevel.level)).label("level"))
+    .where(
+        models.BrightnessLevel.led_id == bindparam("lid"),
+        models.BrightnessLevel.ts >= bindparam("cutoff"),
+    )
+    .group_by(_BUCKET)
+    .order_by(_BUCKET)
+    # server-side cursor: rows are decoded in batches while we build the
+    # points instead of the driver buffering the full result first
+    .execution_options(yield_per=1000)
+)
+
+# cheap "has anything changed?" probe for conditional GETs (index-only)
+_WINDOW_VERSION_STMT = lambda_stmt(
+    lambda: select(func.max(models.BrightnessLevel.ts), func.count())
+    .where(
+        models.BrightnessLevel.led_id == bindparam("lid"),
+        models.BrightnessLevel.ts >= bindparam("cutoff"),
+    )
+)
+
+def _bucket_seconds(hours: int) -> int:
+    """1 min up to 6 h, 5 min up to 24 h, 1 h beyond (max 168 points/week)."""
+    if hours <= 6:
+        return 60
+    if hours <= 24:
+        return 300
+    return 3600
+
 # ──────────────────────────────────────────────────────────────
 @router.get("/leds", response_model=list[s.LedOut])
 def list_leds(db: Session = Depends(get_db)):
     """
     Return every LED fixture (id + wattage) for the dropdown menu.
     """
-    return db.query(models.Led).order_by(models.Led.id).all()
+    return db.execute(_LEDS_STMT).scalars().all()
+
+@router.get("/leds/version", response_model=s.LedsVersion)
+def leds_version(db: Session = Depends(get_db)):
+    """
+    Cheap change tag for the fixture list – clients only refetch /leds
+    when this changes.
+    """
+    max_id, count, total_w = db.execute(_LEDS_VERSION_STMT).one()
+    return s.LedsVersion(version=f"{max_id}:{count}:{total_w}")
 
 # ──────────────────────────────────────────────────────────────
+def _history_points(
+    db: Session, led_id: int, hours: int, cutoff: datetime
+) -> list[s.BrightnessPoint]:
+    # aggregated in SQL → plain Row tuples, no ORM instances; the DB rows
+    # are trusted, so skip per-point validation with model_construct
+    result = db.execute(
+        _HISTORY_STMT,
+        {"lid": led_id, "cutoff": cutoff, "bucket_s": _bucket_seconds(hours)},
+    )
+    return [s.BrightnessPoint.model_construct(ts=int(t), level=int(l)) for t, l in result]
+
+def _history_etag(db: Session, led_id: int, cutoff: datetime, *extra) -> str:
+    """
+    Rows are append-only, so the window is unchanged as long as its newest
+    ts and its row count are unchanged.
+    """
+    last_ts, count = db.execute(
+        _WINDOW_VERSION_STMT, {"lid": led_id, "cutoff": cutoff}
+    ).one()
+    key = ":".join(str(part) for part in (last_ts, count, *extra))
+    return f'"{hashlib.md5(key.encode()).hexdigest()}"'
+
 @router.get("/leds/{led_id}/history", response_model=list[s.BrightnessPoint])
 def led_history(
     led_id: int,
+    request: Request,
+    response: Response,
     hours: int = Query(24, ge=1, le=168),   # user-tunable, but safe-bounded
     db: Session = Depends(get_db),
 ):
     """
-    Brightness timeline for the past ⧖ *hours*.
+    Brightness timeline for the past ⧖ *hours*, averaged per time bucket.
+    Honours If-None-Match: 304 with no body while nothing changed.
     """
     cutoff = datetime.utcnow() - timedelta(hours=hours)
+    etag = _history_etag(db, led_id, cutoff, hours)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
 
-    rows = (
-        db.query(models.BrightnessLevel)
-          .filter(
-              models.BrightnessLevel.led_id == led_id,
-              models.BrightnessLevel.ts >= cutoff,
-          )
-          .order_by(models.BrightnessLevel.ts)
-          .all()
-    )
+    points = _history_points(db, led_id, hours, cutoff)
 
     # extra guard: 404 if LED id doesn’t exist at all
-    if not rows and not db.query(models.Led.id).filter_by(id=led_id).first():
+    if not points and not db.query(models.Led.id).filter_by(id=led_id).first():
         raise HTTPException(status_code=404, detail="LED not found")
 
-    return rows
+    return points
+
+# ──────────────────────────────────────────────────────────────
+@router.get("/dashboard_snapshot", response_model=s.DashboardSnapshot)
+def dashboard_snapshot(
+    led_id: int,
+    request: Request,
+    response: Response,
+    hours: int = Query(24, ge=1, le=168),
+    db: Session = Depends(get_db),
+):
+    """
+    LED metadata + brightness timeline in one round trip (Home page).
+    Same If-None-Match / 304 handling as the history endpoint.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    with db.begin():                    # both reads see the same snapshot
+        led = db.get(models.Led, led_id)
+        if led is None:
+            raise HTTPException(status_code=404, detail="LED not found")
+
+        etag = _history_etag(db, led_id, cutoff, hours, led.wattage)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
+        latest = db.execute(_LATEST_STMT, {"lid": led_id}).first()
+        return s.DashboardSnapshot(
+            led=s.LedOut.model_validate(led),
+            history=_history_points(db, led_id, hours, cutoff),
+            latest=s.BrightnessPoint(ts=latest.ts, level=latest.level) if latest else None,
+        )
 
 
 @router.post("/override_brightness", response_model=s.BrightnessPoint, status_code=201,)
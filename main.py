@@ -1,16 +1,44 @@
 # main.py
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+import asyncio
+import contextlib
+import logging
+import time
+
+import httpx
+import numpy as np
+from fastapi import FastAPI, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, insert, lambda_stmt, select
 from sqlalchemy.orm import Session
 from database import SessionLocal, engine, get_db # create_engine code lives in database.py
 import models, schemas
 from fastapi.middleware.cors import CORSMiddleware
 from led_routers import router as led_router
 
+log = logging.getLogger(__name__)
+
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Adaptive Lighting API", version="1.0")
+# orjson: much faster than stdlib json on long history payloads
+app = FastAPI(
+    title="Adaptive Lighting API",
+    version="1.0",
+    default_response_class=ORJSONResponse,
+)
 app.include_router(led_router)
 
+# outbound calls to the lighting hardware (MQTT bridge / gateway)
+HARDWARE_GATEWAY_URL = None     # e.g. "http://gateway.local:8080" – None = no fan-out
+HTTP_TIMEOUTS = {
+    "hardware": httpx.Timeout(5.0, connect=2.0),
+}
+
+# brightness rows are queued by /readings and written in batches
+BRIGHTNESS_BATCH_SIZE = 50      # rows per INSERT / commit …
+BRIGHTNESS_FLUSH_S    = 0.1     # … or whatever arrived within 100 ms
+brightness_queue: asyncio.Queue[dict] = asyncio.Queue()
+
 # allow Streamlit (localhost:8501) to call the API during dev
 app.add_middleware(
     CORSMiddleware,
@@ -19,12 +47,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# one pooled client for the whole process instead of one per request
+@app.on_event("startup")
+async def open_http_client():
+    app.state.mqtt_client = httpx.AsyncClient(
+        timeout=HTTP_TIMEOUTS["hardware"],
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    )
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await app.state.mqtt_client.aclose()
+
+@app.on_event("startup")
+async def start_brightness_writer():
+    app.state.brightness_writer = asyncio.create_task(brightness_writer())
+
+@app.on_event("shutdown")
+async def stop_brightness_writer():
+    app.state.brightness_writer.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await app.state.brightness_writer
+    # flush whatever is still queued so no reading loses its brightness rows
+    rows = []
+    while not brightness_queue.empty():
+        rows.append(brightness_queue.get_nowait())
+    await run_in_threadpool(persist_brightness, rows)
 
 # --- brightness algorithm ------------------------------------------------
 def calculate_level(lux: int, people: bool) -> int:
@@ -39,10 +87,132 @@ def calculate_level(lux: int, people: bool) -> int:
         return 70
     return 100
 
-def persist_brightness(db: Session, led_ids: list[int], level: int):
-    for led_id in led_ids:
-        db.add(models.BrightnessLevel(led_id=led_id, level=level))
+# same rule as calculate_level, vectorised for /readings/batch:
+# lux < 200 → 100, < 400 → 70, < 600 → 40, else 10
+_LUX_BINS = np.array([200, 400, 600])
+_LEVELS   = np.array([100, 70, 40, 10])
+
+def calculate_levels(lux: np.ndarray, people: np.ndarray) -> np.ndarray:
+    """calculate_level for a whole batch of readings at once."""
+    return np.where(people, _LEVELS[np.searchsorted(_LUX_BINS, lux, side="right")], 0)
+
+def persist_brightness(rows: list[dict]):
+    if not rows:
+        return
+    # one multi-row INSERT + one commit for the whole batch
+    with SessionLocal() as db:
+        db.execute(insert(models.BrightnessLevel), rows)
+        db.commit()
+
+async def brightness_writer():
+    """
+    Drain brightness_queue forever: wait for a first row, collect more for
+    up to BRIGHTNESS_FLUSH_S (or BRIGHTNESS_BATCH_SIZE rows), write them
+    in one transaction off the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await brightness_queue.get()]
+        deadline = loop.time() + BRIGHTNESS_FLUSH_S
+        try:
+            while len(batch) < BRIGHTNESS_BATCH_SIZE:
+                batch.append(
+                    await asyncio.wait_for(brightness_queue.get(), deadline - loop.time())
+                )
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # shutdown mid-collect: hand the rows back for the final flush
+            for row in batch:
+                brightness_queue.put_nowait(row)
+            raise
+        try:
+            await run_in_threadpool(persist_brightness, batch)
+        except Exception:
+            log.exception("dropped %d brightness rows", len(batch))
+
+# sensor → LED wiring changes rarely; cache it per sensor instead of
+# querying it on every packet. Bump the version after editing the map.
+SENSOR_LED_MAP_TTL_S = 300
+_LED_IDS_STMT = lambda_stmt(
+    lambda: select(models.sensor_led_map.c.led_id)
+    .where(models.sensor_led_map.c.sensor_id == bindparam("sid"))
+)
+_led_map_version = 0
+_led_map_cache: dict[int, tuple[int, float, list[int]]] = {}   # sid → (version, fetched_at, led_ids)
+
+def invalidate_sensor_led_map():
+    """Call after changing sensor_led_map so the next reading re-reads it."""
+    global _led_map_version
+    _led_map_version += 1
+
+def linked_led_ids(db: Session, sensor_id: int) -> list[int]:
+    cached = _led_map_cache.get(sensor_id)
+    if (
+        cached
+        and cached[0] == _led_map_version
+        and time.monotonic() - cached[1] < SENSOR_LED_MAP_TTL_S
+    ):
+        return cached[2]
+    led_ids = db.execute(_LED_IDS_STMT, {"sid": sensor_id}).scalars().all()
+    _led_map_cache[sensor_id] = (_led_map_version, time.monotonic(), led_ids)
+    return led_ids
+
+def store_reading(db: Session, data: schemas.SensorReadingIn):
+    """Save the raw reading and return it with the LED ids linked to its sensor."""
+    reading = models.SensorReading(**data.model_dump())
+    db.add(reading)
     db.commit()
+    db.refresh(reading)
+
+    return reading, linked_led_ids(db, data.sensor_id)
+
+def store_readings_batch(
+    db: Session, data: list[schemas.SensorReadingIn]
+) -> tuple[int, dict[int, int]]:
+    """
+    Bulk-insert a batch of readings and their brightness rows.
+    Returns (brightness rows written, {led_id: level of its last reading}).
+    """
+    readings = [d.model_dump() for d in data]
+    db.execute(insert(models.SensorReading), readings)
+
+    led_map: dict[int, list[int]] = {}
+    for sensor_id, led_id in db.execute(
+        select(models.sensor_led_map.c.sensor_id, models.sensor_led_map.c.led_id)
+        .where(models.sensor_led_map.c.sensor_id.in_({d.sensor_id for d in data}))
+    ):
+        led_map.setdefault(sensor_id, []).append(led_id)
+
+    levels = calculate_levels(
+        np.fromiter((d.lux for d in data), dtype=np.int64, count=len(data)),
+        np.fromiter((d.people for d in data), dtype=bool, count=len(data)),
+    )
+    rows = [
+        {"led_id": led_id, "level": int(level)}
+        for d, level in zip(data, levels)
+        for led_id in led_map.get(d.sensor_id, ())
+    ]
+    if rows:
+        db.execute(insert(models.BrightnessLevel), rows)
+    db.commit()
+    return len(rows), {row["led_id"]: row["level"] for row in rows}
+
+async def trigger_hardware(levels: dict[int, int]):
+    """Push {led_id: level} to the fixtures; a failed one never fails the reading."""
+    if HARDWARE_GATEWAY_URL is None or not levels:
+        return
+    client: httpx.AsyncClient = app.state.mqtt_client
+    await asyncio.gather(
+        *(
+            client.post(
+                f"{HARDWARE_GATEWAY_URL}/leds/{led_id}/brightness",
+                json={"level": level},
+            )
+            for led_id, level in levels.items()
+        ),
+        return_exceptions=True,
+    )
 
 # --- endpoints -----------------------------------------------------------
 @app.get("/", status_code=200)
@@ -50,30 +220,34 @@ def home():
     return {"message" : "Hello world!"}
 
 @app.post("/readings", response_model=schemas.SensorReadingOut, status_code=201)
-def ingest_reading(
+async def ingest_reading(
     data: schemas.SensorReadingIn,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
-    # 1 store the raw reading
-    reading = models.SensorReading(**data.model_dump())
-    db.add(reading)
-    db.commit()
-    db.refresh(reading)
+    # 1 store the raw reading + 2 find LEDs linked to this sensor
+    #   (blocking DB driver → keep it off the event loop)
+    reading, led_ids = await run_in_threadpool(store_reading, db, data)
 
-    # 2 find LEDs linked to this sensor
-    led_rows = (
-        db.query(models.Led.id)
-        .join(models.sensor_led_map)
-        .filter(models.sensor_led_map.c.sensor_id == data.sensor_id)
-        .all()
-    )
-    led_ids = [row.id for row in led_rows]
-
-    # 3 compute brightness and schedule persistence
+    # 3 compute brightness and queue it for the batched writer
     level = calculate_level(data.lux, data.people)
-    background_tasks.add_task(persist_brightness, db, led_ids, level)
+    for led_id in led_ids:
+        await brightness_queue.put({"led_id": led_id, "level": level, "ts": reading.ts})
 
-    # 4 (optional) trigger the actual hardware update here, e.g. via MQTT
+    # 4 trigger the actual hardware update over the pooled client
+    await trigger_hardware({led_id: level for led_id in led_ids})
 
     return reading
+
+@app.post("/readings/batch", response_model=schemas.BatchIngestOut, status_code=201)
+async def ingest_readings_batch(
+    data: list[schemas.SensorReadingIn],
+    db: Session = Depends(get_db)
+):
+    """Bulk ingest for sensor gateways: one transaction, vectorised levels."""
+    if not data:
+        return schemas.BatchIngestOut(readings=0, brightness_levels=0)
+
+    written, levels = await run_in_threadpool(store_readings_batch, db, data)
+    await trigger_hardware(levels)
+
+    return schemas.BatchIngestOut(readings=len(data), brightness_levels=written)
@@ -1,5 +1,5 @@
 # models.py
-from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey, SmallInteger, String, Numeric, Table, BigInteger
+from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey, SmallInteger, String, Numeric, Table, BigInteger, Index
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
 
@@ -31,9 +31,14 @@ class SensorReading(Base):
     people    = Column(Boolean, nullable=False)
     ts        = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (Index("ix_sensor_readings_sensor_ts", "sensor_id", "ts"),)
+
 class BrightnessLevel(Base):
     __tablename__ = "brightness_levels"
     id     = Column(BigInteger, primary_key=True, autoincrement=True)
     led_id = Column(Integer, ForeignKey("leds.id"), nullable=False)
     level  = Column(SmallInteger, nullable=False)  # 0-100
     ts     = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # history queries filter on led_id and range-scan / order by ts
+    __table_args__ = (Index("ix_brightness_led_ts", "led_id", "ts"),)
@@ -1,6 +1,6 @@
 # schemas.py
-from pydantic import BaseModel, conint
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, conint, field_validator
+from datetime import datetime, timezone
 
 class SensorReadingIn(BaseModel):
     sensor_id: int
@@ -11,8 +11,11 @@ class SensorReadingOut(SensorReadingIn):
     id: int
     ts: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class BatchIngestOut(BaseModel):
+    readings: int
+    brightness_levels: int
 
 class BrightnessOut(BaseModel):
     led_id: int
@@ -22,16 +25,31 @@ class LedOut(BaseModel):
     id: int
     wattage: float          # e.g. 18.75
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class LedsVersion(BaseModel):
+    version: str
 
 class BrightnessPoint(BaseModel):
-    ts: datetime
+    ts: int                 # epoch seconds, UTC – much smaller + cheaper to parse than ISO
     level: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("ts", mode="before")
+    @classmethod
+    def _epoch_seconds(cls, v):
+        if isinstance(v, datetime):
+            if v.tzinfo is None:            # DB timestamps are naive UTC
+                v = v.replace(tzinfo=timezone.utc)
+            return int(v.timestamp())
+        return v
 
 class BrightnessOverrideIn(BaseModel):
     led_id: int
-    level: int
\ No newline at end of file
+    level: int
+
+class DashboardSnapshot(BaseModel):
+    led: LedOut
+    history: list[BrightnessPoint]
+    latest: BrightnessPoint | None = None   # raw last sample, not bucketed
\ No newline at end of file